@@ -1,7 +1,67 @@
+import functools
+import re
+import time
 import gspread
+from contextlib import contextmanager
 from google.oauth2.service_account import Credentials
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from gspread.exceptions import APIError, SpreadsheetNotFound
+from gspread.utils import absolute_range_name
+
+# Optional: only needed for the DataFrame-based query methods
+try:
+    import pandas as pd
+    from gspread_dataframe import get_as_dataframe
+except ImportError:
+    get_as_dataframe = None
+
+def _col_index_to_letter(index: int) -> str:
+    """Convert a 1-based column index to its A1 letter(s), e.g. 1 -> 'A', 27 -> 'AA'"""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+_A1_RE = re.compile(r"^\$?([A-Za-z]+)\$?(\d+)$")
+
+# Ranges per values.batchGet call; each qualified range adds ~30 characters of
+# query string, so this keeps the request URL safely under length limits
+_BATCH_GET_MAX_RANGES = 50
+
+@functools.lru_cache(maxsize=4096)
+def _a1_to_rc(a1: str):
+    """Convert an A1 cell reference to a (row, col) tuple, cached per string.
+
+    Skips gspread's per-call regex parsing for recently-used references."""
+    match = _A1_RE.match(a1)
+    if not match:
+        raise ValueError(f"Invalid cell reference: '{a1}'")
+    col = 0
+    for char in match.group(1).upper():
+        col = col * 26 + (ord(char) - 64)
+    return int(match.group(2)), col
+
+def _retry(fn):
+    """Retry an API-calling method on 429/500/503 with exponential backoff.
+
+    Honors the server-provided Retry-After header when present, so quota
+    errors pause and recover instead of aborting the caller's workflow."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        delay = 1
+        for _ in range(5):
+            try:
+                return fn(*args, **kwargs)
+            except APIError as e:
+                status = getattr(e.response, "status_code", None)
+                if status not in (429, 500, 503):
+                    raise
+                retry_after = e.response.headers.get("Retry-After")
+                time.sleep(int(retry_after) if retry_after else delay)
+                delay = min(delay * 2, 60)
+        return fn(*args, **kwargs)
+    return wrapper
 
 # When using GoogleSheetManager:
 #	- creds_path: must contain the path to your service account credentials JSON file ("Credentials.json"),
@@ -14,92 +74,195 @@ class GoogleSheetsManager:
         self.scopes = ["https://www.googleapis.com/auth/spreadsheets"]
         self.creds_path = creds_path
         self.spreadsheet_id = spreadsheet_id
+        self._initial_sheet = sheet
         self._worksheet = None
         self.sheet_name = None
+        self._headers_cache: Optional[List[str]] = None
+        self._row_count_cache: Optional[int] = None
+        self._sheet_titles: Optional[List[str]] = None
+        self._pending: Optional[List[dict]] = None
+        self._pending_rows = 0
 
+    # Connection is lazy: no API call happens until a method actually needs one,
+    # so constructing the manager is free and transient network errors only
+    # surface on first use.
+    @functools.cached_property
+    def client(self) -> gspread.Client:
         try:
-            self.creds = Credentials.from_service_account_file(creds_path, scopes=self.scopes)
-            self.client = gspread.authorize(self.creds)
-            self.spreadsheet = self.client.open_by_key(spreadsheet_id)
-            if sheet:
-                self.set_sheet(sheet)
-            else:
-                self._worksheet = self.spreadsheet.sheet1
-                self.sheet_name = self.spreadsheet.sheet1.title
-
+            self.creds = Credentials.from_service_account_file(self.creds_path, scopes=self.scopes)
         except FileNotFoundError:
-            raise FileNotFoundError(f"Credentials file not found at {creds_path}")
+            raise FileNotFoundError(f"Credentials file not found at {self.creds_path}")
+        return gspread.authorize(self.creds)
+
+    @functools.cached_property
+    def spreadsheet(self) -> gspread.Spreadsheet:
+        try:
+            return self.client.open_by_key(self.spreadsheet_id)
         except APIError as e:
             if "disabled" in str(e).lower():
                 raise PermissionError("Google Sheets API is disabled. Please enable it in Google Cloud Console.")
             raise
         except SpreadsheetNotFound:
-            raise ValueError(f"Spreadsheet with ID {spreadsheet_id} not found")
+            raise ValueError(f"Spreadsheet with ID {self.spreadsheet_id} not found")
+
+    @property
+    def _ws(self) -> gspread.Worksheet:
+        # Resolve the worksheet on first use: the constructor's sheet if given,
+        # otherwise the first sheet of the spreadsheet
+        if self._worksheet is None:
+            if self._initial_sheet:
+                self.set_sheet(self._initial_sheet)
+            else:
+                self._worksheet = self.spreadsheet.sheet1
+                self.sheet_name = self._worksheet.title
+        return self._worksheet
 
     # ==================== SHEET MANAGEMENT ==================== #
     # == setters
+    @_retry
     def set_sheet(self, sheet_name: str):
         try:
-            self.sheet_name = self.spreadsheet.worksheet(sheet_name).title
-            self._worksheet = self.spreadsheet.worksheet(sheet_name)
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            self.sheet_name = worksheet.title
+            self._worksheet = worksheet
+            self._invalidate_caches()
         except gspread.WorksheetNotFound:
             raise ValueError(f"Sheet with name '{sheet_name}' not found in spreadsheet.")
+    def _invalidate_caches(self):
+        """Drop cached headers/row count after any write that may change them"""
+        self._headers_cache = None
+        self._row_count_cache = None
     # == getters
     def get_sheet(self) -> gspread.Worksheet:
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        return self._worksheet
+        return self._ws
     def get_sheet_name(self) -> str:
-        if self.sheet_name is None:
-            raise ValueError("No sheet name set. Use set_sheet() to select a worksheet.")
+        self._ws  # Resolve the worksheet if it hasn't been yet
         return self.sheet_name
     def get_all_sheets(self) -> List[str]:
-        return [sheet.title for sheet in self.spreadsheet.worksheets()]
+        return list(self._get_sheet_titles())
+    def sheet_exists(self, sheet_name: str) -> bool:
+        return sheet_name in self._get_sheet_titles()
+    @_retry
+    def _get_sheet_titles(self) -> List[str]:
+        # Cached so repeated existence checks don't each hit the API
+        if self._sheet_titles is None:
+            self._sheet_titles = [sheet.title for sheet in self.spreadsheet.worksheets()]
+        return self._sheet_titles
 
     # ==================== DATA MANAGEMENT ==================== #
     # == Single cell
+    @_retry
     def get_cell(self, cell: str) -> Union[str, int, float]:
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        return self._worksheet.acell(cell).value
+        return self._ws.cell(*_a1_to_rc(cell)).value
+    @_retry
     def update_cell(self, cell: str, value: Union[str, int, float]):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        self._worksheet.update_acell(cell, value)
+        if self._pending is not None:
+            self._pending.append({"range": cell, "values": [[value]], "input_option": "USER_ENTERED"})
+            return
+        row, col = _a1_to_rc(cell)
+        self._ws.update_cell(row, col, value)
+    @_retry
     def del_cell(self, cell: str):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        self._worksheet.update_acell(cell, "")
+        if self._pending is not None:
+            self._pending.append({"range": cell, "values": [[""]], "input_option": "USER_ENTERED"})
+            return
+        row, col = _a1_to_rc(cell)
+        self._ws.update_cell(row, col, "")
 
     # == Range of cells
+    @_retry
     def get_range(self, cell_range: str) -> List[List[Union[str, int, float]]]:
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        return self._worksheet.get(cell_range)
+        return self._ws.get(cell_range)
+    @_retry
     def update_range(self, cell_range: str, values: List[List[Union[str, int, float]]]):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        self._worksheet.update(cell_range, values)
+        if self._pending is not None:
+            # RAW to match the direct path's gspread update() default
+            self._pending.append({"range": cell_range, "values": values, "input_option": "RAW"})
+            self._invalidate_caches()
+            return
+        self._ws.update(cell_range, values)
+        self._invalidate_caches()
+    @_retry
     def del_range(self, cell_range: str):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        self._worksheet.batch_clear([cell_range])
+        self._ws.batch_clear([cell_range])
+        self._invalidate_caches()
+
+    @_retry
+    def _batch_get(self, ranges: List[str], value_render_option: Optional[str] = None) -> List[List[List[Union[str, int, float]]]]:
+        """Fetch multiple ranges of the current sheet in one API round-trip"""
+        self._ws  # Resolve the worksheet so sheet_name is set
+        qualified = [absolute_range_name(self.sheet_name, cell_range) for cell_range in ranges]
+        params = {"valueRenderOption": value_render_option} if value_render_option else None
+        response = self.spreadsheet.values_batch_get(ranges=qualified, params=params)
+        return [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
+
+    @contextmanager
+    def batch(self):
+        """Collect writes made inside the block and flush them as one batch update.
+
+        Inside `with manager.batch():`, update_cell, del_cell, update_range and
+        db_add_value(s) queue their writes instead of each issuing an API call;
+        the queue is flushed when the block exits. Each write keeps the input
+        option of its direct path (RAW for update_range, USER_ENTERED for the
+        rest), so a flush issues one batch update per input option used."""
+        self._pending = []
+        self._pending_rows = 0
+        try:
+            yield self
+        finally:
+            pending, self._pending = self._pending, None
+            self._pending_rows = 0
+            if pending:
+                try:
+                    self._flush_pending(pending)
+                except Exception:
+                    # The queued IDs and row counts were applied optimistically;
+                    # drop them so the next insert re-reads the real state
+                    self._invalidate_caches()
+                    raise
+    @_retry
+    def _flush_pending(self, pending: List[dict]):
+        # One values.batchUpdate carries a single valueInputOption, so flush
+        # the queued writes grouped by the option their direct path would use
+        for option in ("USER_ENTERED", "RAW"):
+            data = [{"range": entry["range"], "values": entry["values"]}
+                    for entry in pending if entry["input_option"] == option]
+            if data:
+                self._ws.batch_update(data, value_input_option=option)
 
     # == All values
+    @_retry
     def get_all_values(self) -> List[List[Union[str, int, float]]]:
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        return self._worksheet.get_all_values()
+        return self._ws.get_all_values()
+    def iter_all_values(self, chunk_rows: int = 1000) -> Iterator[List[Union[str, int, float]]]:
+        """Yield worksheet rows lazily in blocks of chunk_rows.
+
+        Trades a few extra API calls for holding only one block in memory at a
+        time, instead of materializing the whole sheet like get_all_values."""
+        end_letter = _col_index_to_letter(self._ws.col_count)
+        total = self._ws.row_count
+        for start in range(1, total + 1, chunk_rows):
+            end = min(start + chunk_rows - 1, total)
+            # The API trims trailing blank rows within each chunk, so a short
+            # block doesn't mean the sheet has ended — iterate the whole grid;
+            # chunks past the populated region come back empty and cost little
+            for row in self.get_range(f"A{start}:{end_letter}{end}"):
+                yield row
+    @_retry
     def clear(self):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        self._worksheet.clear()
+        self._ws.clear()
+        self._invalidate_caches()
 
     # ==================== CELL MANAGEMENT ==================== #
+    @_retry
     def move_to(self, cell: str, target_cell: str):
-        value = self.get_cell(cell)
-        self.update_cell(target_cell, value)
-        self.del_cell(cell)
+        # One batched read + one batched write (target + source blank) instead of 3 calls
+        result = self._ws.batch_get([cell])
+        value = result[0][0][0] if result[0] else ""
+        self._ws.batch_update([
+            {"range": target_cell, "values": [[value]]},
+            {"range": cell, "values": [[""]]},
+        ], value_input_option="USER_ENTERED")
     def copy_to(self, cell: str, target_cell: str):
         value = self.get_cell(cell)
         self.update_cell(target_cell, value)
@@ -108,54 +271,170 @@ class GoogleSheetsManager:
     # DATA BASE MANAGEMENT
     # ========================================================== #
     def db_get_headers(self) -> List[str]:
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        
-        # Assuming headers are in the first row
-        headers = self._worksheet.row_values(1)
-        return headers
+        # Assuming headers are in the first row; cached to avoid re-reading on every call
+        if self._headers_cache is None:
+            rows = self._batch_get(["1:1"])[0]
+            self._headers_cache = rows[0] if rows else []
+        return self._headers_cache
+    @_retry
     def db_add_header(self, header: str):
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
         headers = self.db_get_headers()
         if header in headers:
             raise ValueError(f"Header '{header}' already exists.")
         else:
-            headers.append(header)
-            self._worksheet.update('A1', [headers])
+            headers = headers + [header]
+            self._ws.update('A1', [headers], value_input_option="RAW")
+            self._headers_cache = headers
+    @_retry
     def db_add_headers(self, headers: List[str]):
-        """Add multiple headers to the database"""
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        
-        for header in headers:
-            self.db_add_header(header)
+        """Add multiple headers to the database in a single API call"""
+        existing = self.db_get_headers()
+        duplicates = set(existing) & set(headers)
+        if duplicates:
+            raise ValueError(f"Headers {sorted(duplicates)} already exist.")
+        new_headers = existing + list(headers)
+        self._ws.update('A1', [new_headers], value_input_option="RAW")
+        self._headers_cache = new_headers
+    def db_del_header(self, header: str):
+        """Delete a header column from the database"""
+        self.db_del_headers([header])
+    @_retry
+    def db_del_headers(self, headers: List[str]):
+        """Delete multiple header columns from the database in a single API call"""
+        existing = self.db_get_headers()
+        if len(set(headers)) != len(headers):
+            raise ValueError("Duplicate header names given.")
+        missing = [header for header in headers if header not in existing]
+        if missing:
+            raise ValueError(f"Headers {sorted(missing)} not found.")
+        sheet_id = self._ws.id
+        # Delete from the right so earlier deletions don't shift later indices
+        indices = sorted({existing.index(header) for header in headers}, reverse=True)
+        self.spreadsheet.batch_update({"requests": [
+            {"deleteDimension": {"range": {"sheetId": sheet_id, "dimension": "COLUMNS", "startIndex": index, "endIndex": index + 1}}}
+            for index in indices
+        ]})
+        self._headers_cache = [header for header in existing if header not in headers]
+    @_retry
     def db_create(self, headers: Optional[List[str]] = None):
         """Create a new database with the specified headers, clearing the actual sheet and adding ID by default"""
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-
-        self.clear()
-        self.db_add_header("ID")  # Always add an ID header
-        if headers:
-            for header in headers:
-                self.db_add_header(header)  
+        all_headers = ["ID", *(headers or [])]  # Always add an ID header
+        sheet_id = self._ws.id
+        # One atomic batchUpdate: clear the sheet and write the header row together,
+        # so a failure can't leave a half-initialized database
+        self.spreadsheet.batch_update({"requests": [
+            {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}},
+            {"updateCells": {
+                "rows": [{"values": [{"userEnteredValue": {"stringValue": str(header)}} for header in all_headers]}],
+                "fields": "userEnteredValue",
+                "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+            }},
+        ]})
+        self._headers_cache = all_headers
+        self._row_count_cache = 1
     def db_add_value(self, values: List[Union[str, int, float]]):
         """Add a new row of values to the database"""
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        
+        self.db_add_values([values])
+    @_retry
+    def db_add_values(self, rows: List[List[Union[str, int, float]]]):
+        """Add multiple rows of values to the database in a single API call"""
+        headers = self.db_get_headers()
+        for row in rows:
+            if len(row) != len(headers) - 1:  # Exclude ID header
+                raise ValueError(f"Expected {len(headers) - 1} values, got {len(row)}")
+        if self._row_count_cache is None:
+            self._row_count_cache = self._populated_row_count()
+            if self._pending is not None:
+                # A queued write invalidated the cache mid-batch; the server
+                # count doesn't include the rows still waiting in the queue
+                self._row_count_cache += self._pending_rows
+        next_id = self._row_count_cache  # Header row makes the next ID equal the current row count
+        payload = [[next_id + offset, *row] for offset, row in enumerate(rows)]
+        if self._pending is not None:
+            # Queue the rows at their computed position; flushed on batch() exit
+            self._pending.append({"range": f"A{self._row_count_cache + 1}", "values": payload, "input_option": "USER_ENTERED"})
+            self._pending_rows += len(rows)
+        else:
+            self._ws.append_rows(payload, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+        self._row_count_cache += len(rows)
+    @_retry
+    def _populated_row_count(self) -> int:
+        # Only column A is needed to count populated rows; fetching the whole
+        # sheet for a count would transfer every column for nothing
+        return len(self._ws.col_values(1))
+    def _header_to_col_letter(self, header: str) -> str:
         headers = self.db_get_headers()
-        if len(values) != len(headers) - 1:  # Exclude ID header
-            raise ValueError(f"Expected {len(headers) - 1} values, got {len(values)}")
+        if header not in headers:
+            raise ValueError(f"Header '{header}' not found.")
+        return _col_index_to_letter(headers.index(header) + 1)
+    @_retry
+    def db_get_column(self, column: str) -> List[Union[str, int, float]]:
+        """Get all values from a single column, excluding the header"""
+        letter = self._header_to_col_letter(column)
+        # Fetch only the requested column instead of the whole sheet
+        rows = self._ws.get(f"{letter}2:{letter}")
+        return [row[0] if row else "" for row in rows]
+    def db_get_values_where(self, column: str, value: Union[str, int, float]) -> List[List[Union[str, int, float]]]:
+        """Get all rows where the given column matches the given value"""
+        letter = self._header_to_col_letter(column)
+        # Stage 1: fetch only the filter column, stage 2: fetch just the matching rows.
+        # Unformatted values keep numbers as numbers, so "1,234"-style locale
+        # formatting can't break the equality check
+        col_rows = self._batch_get([f"{letter}2:{letter}"], value_render_option="UNFORMATTED_VALUE")[0]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            matches = [i for i, row in enumerate(col_rows) if row and row[0] == value]
+        else:
+            needle = str(value)
+            matches = [i for i, row in enumerate(col_rows) if row and str(row[0]) == needle]
+        if not matches:
+            return []
+        end_letter = _col_index_to_letter(len(self.db_get_headers()))
+        # Coalesce consecutive matched rows into single spans so large result
+        # sets don't put one range per row on the request URL
+        spans = []
+        for i in matches:
+            row_number = i + 2
+            if spans and row_number == spans[-1][1] + 1:
+                spans[-1][1] = row_number
+            else:
+                spans.append([row_number, row_number])
+        ranges = [f"A{start}:{end_letter}{end}" for start, end in spans]
+        result_rows = []
+        for chunk_start in range(0, len(ranges), _BATCH_GET_MAX_RANGES):
+            chunk = ranges[chunk_start:chunk_start + _BATCH_GET_MAX_RANGES]
+            for block in self._batch_get(chunk, value_render_option="UNFORMATTED_VALUE"):
+                result_rows.extend(block)
+        return result_rows
+    def db_get_values_where_df(self, column: str, value: Union[str, int, float]) -> List[List[Union[str, int, float]]]:
+        """Get all rows where the given column matches the given value, filtered with Pandas.
+
+        Much faster than db_get_values_where on sheets with thousands of rows,
+        but requires the optional gspread-dataframe package."""
+        if get_as_dataframe is None:
+            raise ImportError("gspread-dataframe is required for db_get_values_where_df. Install it with 'pip install gspread-dataframe'.")
+        df = get_as_dataframe(self._ws, evaluate_formulas=False, header=0)
+        df = df.dropna(how="all")  # get_as_dataframe pads the grid with blank rows
+        # Same typed matching as db_get_values_where: numeric filters compare as
+        # numbers so locale formatting and float coercion can't break equality
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            mask = pd.to_numeric(df[column], errors="coerce") == value
         else:
-            next_row = len(self._worksheet.get_all_values()) + 1
-            values.insert(0, next_row - 1)
-            self._worksheet.append_row(values)
+            mask = df[column].astype(str) == str(value)
+        return df[mask].values.tolist()
+    def db_get_values_with_id(self, id_value: Union[str, int]) -> List[List[Union[str, int, float]]]:
+        """Get all rows whose ID column matches the given value"""
+        try:
+            id_value = int(id_value)  # IDs are written as integers; match them as such
+        except (TypeError, ValueError):
+            pass
+        return self.db_get_values_where("ID", id_value)
+    @_retry
     def db_get_all_values(self) -> List[List[Union[str, int, float]]]:
         """Get all values from the database, including the ID column but excluding headers"""
-        if self._worksheet is None:
-            raise ValueError("No worksheet set. Use set_sheet() to select a worksheet.")
-        
-        all_values = self._worksheet.get_all_values()
-        return all_values[1:]
\ No newline at end of file
+        all_values = self._ws.get_all_values()
+        return all_values[1:]
+    def db_iter_all_values(self, chunk_rows: int = 1000) -> Iterator[List[Union[str, int, float]]]:
+        """Like db_get_all_values, but yields rows lazily without the header row"""
+        iterator = self.iter_all_values(chunk_rows)
+        next(iterator, None)  # Skip the header row
+        yield from iterator